@@ -1,29 +1,68 @@
 """
 Download logic and progress handling for the JioSaavn downloader.
-Enhanced UI with panels that disappear after display.
+Enhanced UI with status panels.
 """
 
+import os
 import re
-import subprocess
 from pathlib import Path
 from typing import Optional
-from rich.progress import Progress, BarColumn, TextColumn, TimeRemainingColumn, TimeElapsedColumn, SpinnerColumn
+from rich.progress import Progress, BarColumn, TextColumn, TimeRemainingColumn
 from rich.console import Console
 from rich.panel import Panel
 from rich.text import Text
 from rich.table import Table
 from rich.align import Align
 from rich import box
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-from .utils import probe_info, choose_outputs
+from .utils import probe_info, choose_outputs, run_stream, QuietLogger
 from .metadata import tag_flac, tag_mp3
 
+try:
+    from yt_dlp import YoutubeDL
+    from yt_dlp.utils import DownloadCancelled, DownloadError
+except ImportError:  # fall back to the yt-dlp executable
+    YoutubeDL = None
+
 
 progress_line_re = re.compile(
-    r"^\[download\]\s+(\d{1,3}\.\d)%\s+of\s+([\d\.]+[KMG]iB)\s+at\s+([\d\.]+[KMG]iB/s)\s+ETA\s+([\d:]+)"
+    rb"^\[download\]\s+(\d{1,3}\.\d)%\s+of\s+([\d\.]+[KMG]iB)\s+at\s+([\d\.]+[KMG]iB/s)\s+ETA\s+([\d:]+)"
 )
 
+
+def _workers() -> int:
+    """CPUs this process may actually run on (respects taskset/cgroup cpusets on Linux)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 4
+
+
+# Parallel fragment fetches within one track (only matters for segmented streams)
+_CONCURRENT_FRAGMENTS = min(_workers(), 4)
+
+_YTDLP_BASE_ARGS = (
+    "yt-dlp",
+    "--ignore-config",
+    "--no-part",
+    "--prefer-ffmpeg",
+    "--embed-thumbnail",
+    "--add-metadata",
+    "--no-playlist",
+    "--newline",
+    "--concurrent-fragments", str(_CONCURRENT_FRAGMENTS),
+    "--extractor-args", "jiosaavn:all",
+)
+_MP3_320_ARGS = ("-x", "--audio-format", "mp3", "--audio-quality", "320K")
+_FLAC_ARGS = ("-x", "--audio-format", "flac")
+
+# Redraw a track's bar at most every 0.1s unless it moved by at least 0.5%
+_PROGRESS_MIN_INTERVAL = 0.1
+_PROGRESS_MIN_STEP = 0.5
+
 console = Console()
 
 
@@ -152,35 +191,116 @@ def create_stats_panel(total: int, successful: int, failed: int):
 
 
 def download_with_progress(entry_url: str, outtmpl: str, to_flac: bool, to_mp3_320: bool, 
-                           track_task=None, progress: Optional[Progress]=None) -> int:
-    """Download a track with progress visualization."""
-    base = [
-        "yt-dlp",
-        "--ignore-config",
-        "--no-part",
-        "--prefer-ffmpeg",
-        "--embed-thumbnail",
-        "--add-metadata",
-        "--no-playlist",
-        "--extractor-args", "jiosaavn:all",
-    ]
-    post = []
+                           track_task=None, progress: Optional[Progress]=None,
+                           stop: Optional[threading.Event]=None, info: Optional[dict]=None) -> int:
+    """
+    Download a track with progress visualization; setting `stop` aborts an in-process download.
+    `info` is the track's already-resolved probe entry, which the in-process path downloads
+    from directly instead of extracting `entry_url` again.
+    """
+    if YoutubeDL is not None:
+        return _download_in_process(entry_url, outtmpl, to_flac, to_mp3_320, track_task, progress, stop, info)
+    # yt-dlp runs in our process group here, so Ctrl-C reaches it directly
+    return _download_subprocess(entry_url, outtmpl, to_flac, to_mp3_320, track_task, progress)
+
+
+def _ydl_options(outtmpl: str, to_flac: bool, to_mp3_320: bool) -> dict:
+    """Build YoutubeDL options equivalent to the command line used by _download_subprocess."""
+    postprocessors = []
     if to_mp3_320:
-        post = ["-x", "--audio-format", "mp3", "--audio-quality", "320K"]
+        postprocessors.append({"key": "FFmpegExtractAudio", "preferredcodec": "mp3", "preferredquality": "320"})
     elif to_flac:
-        post = ["-x", "--audio-format", "flac"]
+        postprocessors.append({"key": "FFmpegExtractAudio", "preferredcodec": "flac"})
+    postprocessors.append({"key": "FFmpegMetadata", "add_metadata": True})
+    postprocessors.append({"key": "EmbedThumbnail"})
+
+    opts = {
+        "outtmpl": outtmpl,
+        "quiet": True,
+        "no_warnings": True,
+        # quiet only covers progress and info; errors would otherwise print under the progress bars
+        "logger": QuietLogger(),
+        "noprogress": True,
+        "nopart": True,
+        "concurrent_fragment_downloads": _CONCURRENT_FRAGMENTS,
+        "noplaylist": True,
+        "writethumbnail": True,
+        "extractor_args": {"jiosaavn": {"all": [""]}},
+        "postprocessors": postprocessors,
+    }
+    if to_mp3_320 or to_flac:
+        opts["format"] = "bestaudio/best"
+    return opts
+
+
+def _download_in_process(entry_url: str, outtmpl: str, to_flac: bool, to_mp3_320: bool,
+                         track_task=None, progress: Optional[Progress]=None,
+                         stop: Optional[threading.Event]=None, info: Optional[dict]=None) -> int:
+    """Download a track through the yt-dlp Python API, driving progress from its hooks."""
+    opts = _ydl_options(outtmpl, to_flac, to_mp3_320)
+    show_progress = progress and track_task is not None
+
+    if show_progress or stop is not None:
+        last_percent = 0.0
+        last_update = 0.0
+
+        def hook(d):
+            nonlocal last_percent, last_update
+            # Worker threads never see KeyboardInterrupt; abort at the next progress report instead
+            if stop is not None and stop.is_set():
+                raise DownloadCancelled("Download interrupted by user")
+            if not show_progress or d.get("status") != "downloading":
+                return
+            total = d.get("total_bytes") or d.get("total_bytes_estimate")
+            if total:
+                pct = d.get("downloaded_bytes", 0) * 100 / total
+                now = time.monotonic()
+                if now - last_update < _PROGRESS_MIN_INTERVAL and pct - last_percent < _PROGRESS_MIN_STEP:
+                    return
+                last_percent, last_update = pct, now
+                progress.update(track_task, completed=pct, total=100)
+
+        opts["progress_hooks"] = [hook]
+
+    try:
+        with YoutubeDL(opts) as ydl:
+            if info is not None:
+                try:
+                    # Copy, since yt-dlp annotates the dict it processes
+                    ydl.process_ie_result(dict(info), download=True)
+                    return 0
+                except DownloadError:
+                    pass  # e.g. the signed format URLs expired; extract the track afresh
+            return ydl.download([entry_url])
+    except (DownloadError, DownloadCancelled):
+        return 1
+
+
+def _download_subprocess(entry_url: str, outtmpl: str, to_flac: bool, to_mp3_320: bool,
+                         track_task=None, progress: Optional[Progress]=None) -> int:
+    """Download a track by running the yt-dlp executable and parsing its progress lines."""
+    post = ()
+    if to_mp3_320:
+        post = _MP3_320_ARGS
+    elif to_flac:
+        post = _FLAC_ARGS
 
-    cmd = base + post + ["-o", outtmpl, entry_url]
+    cmd = [*_YTDLP_BASE_ARGS, *post, "-o", outtmpl, entry_url]
     
     last_percent = 0.0
+    last_update = 0.0
     for kind, payload in run_stream(cmd):
         if kind == "line":
-            line = payload
-            if progress and track_task is not None:
-                m = progress_line_re.match(line.strip())
+            line = payload.strip()
+            # Cheap prefix check so non-progress lines never reach the regex
+            if progress and track_task is not None and line.startswith(b"[download]"):
+                m = progress_line_re.match(line)
                 if m:
                     pct = float(m.group(1))
-                    last_percent = pct
+                    now = time.monotonic()
+                    if now - last_update < _PROGRESS_MIN_INTERVAL and pct - last_percent < _PROGRESS_MIN_STEP:
+                        continue
+                    last_percent, last_update = pct, now
                     progress.update(track_task, completed=pct, total=100)
         elif kind == "rc":
             rc = payload
@@ -188,30 +308,78 @@ def download_with_progress(entry_url: str, outtmpl: str, to_flac: bool, to_mp3_3
     return 1
 
 
-def run_stream(cmd):
-    """Helper function to stream subprocess output."""
-    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1)
-    for line in proc.stdout:
-        yield ("line", line.rstrip("\n"))
-    rc = proc.wait()
-    yield ("rc", rc)
+def _download_one(entry, outputs, url: str, to_flac: bool, to_mp3_320: bool, prog: Progress,
+                  tagger: ThreadPoolExecutor, stop: threading.Event, reuse_probe: bool) -> Optional[bool]:
+    """Download and queue tagging for one entry; None means the entry was empty or the run was stopped."""
+    if not entry or stop.is_set():
+        return None
+
+    track_url = entry.get("webpage_url") or entry.get("url") or url
+    if not track_url:
+        return False
+
+    subdir, filename, artists, album, title, tracknum = outputs
+    outtmpl = str((subdir / f"{filename}.%(ext)s").as_posix())
+
+    # Track progress with clean naming
+    track_name = title[:25] + "..." if len(title) > 25 else title
+    track_task = prog.add_task(track_name, total=100)
+
+    rc = download_with_progress(
+        entry_url=track_url,
+        outtmpl=outtmpl,
+        to_flac=to_flac,
+        to_mp3_320=to_mp3_320,
+        track_task=track_task,
+        progress=prog,
+        stop=stop,
+        info=entry if reuse_probe else None,
+    )
+
+    prog.update(track_task, completed=100)
+    prog.remove_task(track_task)
 
+    # Tag the downloaded file
+    ext = "mp3" if to_mp3_320 else "flac"
+    final_path = subdir / f"{filename}.{ext}"
 
-def process_url(url: str, out_dir: Path, to_flac: bool, to_mp3_320: bool, album_layout: bool):
-    """Process a URL and download tracks with panels that disappear."""
+    # One stat covers both "missing" and "empty" (an aborted conversion)
+    try:
+        if final_path.stat().st_size == 0:
+            return False
+    except OSError:
+        return False
+    tagger.submit(tag_flac if ext == "flac" else tag_mp3, final_path, entry)
+    return True
+
+
+def process_urls(urls, out_dir: Path, to_flac: bool, to_mp3_320: bool, album_layout: bool,
+                 jobs: int = 1):
+    """Probe all URLs concurrently, then download them one after another."""
+    # Probe each distinct URL once; concurrent probes of the same URL would all miss the memo
+    unique = list(dict.fromkeys(urls))
+    with console.status("🔍 Analyzing URLs and extracting information...", spinner="dots"):
+        with ThreadPoolExecutor(max_workers=min(len(unique), 4)) as ex:
+            infos = dict(zip(unique, ex.map(probe_info, unique)))
+
+    for url in urls:
+        process_url(url, out_dir, to_flac, to_mp3_320, album_layout, info=infos[url], jobs=jobs)
+
+
+def process_url(url: str, out_dir: Path, to_flac: bool, to_mp3_320: bool, album_layout: bool,
+                info: Optional[dict] = None, jobs: int = 1):
+    """Process a URL and download tracks, reporting progress with panels."""
     
     # Display header
     console.print(create_header())
-    time.sleep(1)  # Brief pause to show header
     
     # Display configuration
     console.print(create_config_panel(out_dir, to_flac, to_mp3_320, album_layout))
-    time.sleep(1)  # Brief pause to show config
     
-    # Processing indicator with status
-    with console.status("🔍 Analyzing URL and extracting information...", spinner="dots"):
-        time.sleep(0.5)  # Brief processing indication
-        info = probe_info(url)
+    # Processing indicator with status (skipped when the caller already probed)
+    if info is None:
+        with console.status("🔍 Analyzing URL and extracting information...", spinner="dots"):
+            info = probe_info(url)
     
     if not info:
         error_panel = Panel(
@@ -228,12 +396,10 @@ def process_url(url: str, out_dir: Path, to_flac: bool, to_mp3_320: bool, album_
     
     # Display content type information
     console.print(create_content_panel(is_playlist, len(entries), url))
-    time.sleep(1)  # Brief pause to show content info
     
     # Show track information if available
     if entries and entries[0]:
         console.print(create_track_info_panel(entries[0]))
-        time.sleep(1)  # Brief pause to show track info
     
     if is_playlist and not entries:
         error_panel = Panel(
@@ -250,12 +416,17 @@ def process_url(url: str, out_dir: Path, to_flac: bool, to_mp3_320: bool, album_
     successful_downloads = 0
     failed_downloads = 0
     
-    # Clear screen and show minimal download interface
-    console.clear()
+    # Show minimal download interface
     console.print(f"⬇️  Downloading {total_tracks} track{'s' if total_tracks != 1 else ''}...\n")
     
-    # Minimal progress bars for downloads
-    with Progress(
+    # jobs == 0 means one download per CPU core
+    if jobs == 0:
+        jobs = min(total_tracks, _workers())
+
+    # Minimal progress bars for downloads; up to `jobs` tracks download at once
+    # and tagging runs on a separate pool (file I/O, so up to 8 threads) that
+    # overlaps with the remaining downloads
+    with ThreadPoolExecutor(max_workers=min(total_tracks, 8)) as tagger, Progress(
         TextColumn("{task.description}"),
         BarColumn(bar_width=30),
         TextColumn("{task.percentage:>5.1f}%"),
@@ -269,59 +440,38 @@ def process_url(url: str, out_dir: Path, to_flac: bool, to_mp3_320: bool, album_
         if is_playlist:
             overall_task = prog.add_task("Overall", total=total_tracks)
 
-        for idx, entry in enumerate(entries, start=1):
-            if not entry:
-                if overall_task is not None:
-                    prog.advance(overall_task, 1)
-                continue
-
-            track_url = entry.get("webpage_url") or entry.get("url") or url
-            if not track_url:
-                failed_downloads += 1
-                if overall_task is not None:
-                    prog.advance(overall_task, 1)
-                continue
-
-            subdir, filename, artists, album, title, tracknum = choose_outputs(
-                entry, out_dir, album_layout or is_playlist
-            )
-            outtmpl = str((subdir / f"{filename}.%(ext)s").as_posix())
-
-            # Track progress with clean naming
-            track_name = title[:25] + "..." if len(title) > 25 else title
-            track_task = prog.add_task(track_name, total=100)
-
-            rc = download_with_progress(
-                entry_url=track_url,
-                outtmpl=outtmpl,
-                to_flac=to_flac,
-                to_mp3_320=to_mp3_320,
-                track_task=track_task,
-                progress=prog,
-            )
-
-            prog.update(track_task, completed=100)
-            prog.remove_task(track_task)
-
-            # Tag the downloaded file
-            ext = "mp3" if to_mp3_320 else "flac"
-            final_path = subdir / f"{filename}.{ext}"
-            
-            if final_path.exists():
-                if ext == "flac":
-                    tag_flac(final_path, entry)
-                elif ext == "mp3":
-                    tag_mp3(final_path, entry)
-                successful_downloads += 1
-            else:
-                failed_downloads += 1
-
-            if overall_task is not None:
-                prog.advance(overall_task, 1)
+        # Resolve every output path up front, on this thread, before any download starts
+        force_album_layout = album_layout or is_playlist
+        all_outputs = [choose_outputs(entry, out_dir, force_album_layout) if entry else None for entry in entries]
+        # Entries from a probe made in this run download without a second extraction;
+        # ones read back from the disk cache may carry expired format URLs
+        reuse_probe = bool(info.get("_live_probe"))
+        stop = threading.Event()
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+            futures = [
+                pool.submit(_download_one, entry, outputs, url, to_flac, to_mp3_320,
+                            prog, tagger, stop, reuse_probe)
+                for entry, outputs in zip(entries, all_outputs)
+            ]
+            try:
+                for future in as_completed(futures):
+                    ok = future.result()
+                    if ok:
+                        successful_downloads += 1
+                    elif ok is not None:
+                        failed_downloads += 1
+                    if overall_task is not None:
+                        prog.advance(overall_task, 1)
+            except BaseException:
+                # Ctrl-C lands here in the main thread: drop queued tracks and tag writes,
+                # and tell running in-process downloads to abort, before re-raising
+                stop.set()
+                pool.shutdown(wait=False, cancel_futures=True)
+                tagger.shutdown(wait=False, cancel_futures=True)
+                raise
 
     # Show completion statistics with panel
     console.print(create_stats_panel(total_tracks, successful_downloads, failed_downloads))
-    time.sleep(2)  # Show stats for 2 seconds
     
     # Final status message with appropriate panel styling
     if successful_downloads == total_tracks:
@@ -352,9 +502,5 @@ def process_url(url: str, out_dir: Path, to_flac: bool, to_mp3_320: bool, album_
             box=box.ROUNDED
         )
         console.print(error_panel)
-    
-    time.sleep(2)  # Show final status for 2 seconds
-    
-    # Clear to minimal final state
-    console.clear()
+
     console.print(f"Complete: {successful_downloads}/{total_tracks} tracks downloaded to {out_dir}")
@@ -3,46 +3,52 @@ Main entry point for the JioSaavn downloader.
 """
 
 import argparse
-import sys
 from pathlib import Path
-from rich.console import Console
-from rich.traceback import install
 
-from .downloader import process_url
 
-# Install rich traceback handler for better error visualization
-install()
-console = Console()
+def _rich_print(message: str, with_traceback: bool = False):
+    """Print through rich, imported lazily since only the error paths need it here."""
+    from rich.console import Console
+    console = Console()
+    console.print(message)
+    if with_traceback:
+        console.print_exception()
+
+
+def _jobs(value: str) -> int:
+    """argparse type for --jobs: 0 (one per CPU core) or a positive download count."""
+    jobs = int(value)
+    if jobs < 0:
+        raise argparse.ArgumentTypeError(f"must be 0 or more, got {jobs}")
+    return jobs
 
 
 def main():
     """Main entry point for the JioSaavn downloader."""
     parser = argparse.ArgumentParser(description="Download JioSaavn tracks/albums with embedded cover art")
-    parser.add_argument("url", help="JioSaavn song or album URL")
+    parser.add_argument("urls", nargs="+", metavar="url", help="JioSaavn song or album URL(s)")
     parser.add_argument("--out", default=".", help="Output directory")
     parser.add_argument("--album", action="store_true", help="Force album-style folder layout")
     parser.add_argument("--mp3-320", action="store_true", help="Output MP3 ~320 kbps instead of FLAC")
+    parser.add_argument("--jobs", type=_jobs, default=1,
+                        help="Number of album/playlist tracks to download in parallel (0 = one per CPU core)")
+    # --help and usage errors exit here, before the downloader (rich, yt-dlp, mutagen) is imported
     args = parser.parse_args()
 
-    # Check if help was requested
-    if '-h' in sys.argv or '--help' in sys.argv:
-        parser.print_help()
-        return
+    from .downloader import process_urls
 
-    out_dir = Path(args.out).expanduser().resolve()
+    out_dir = Path(args.out).expanduser().absolute()
     out_dir.mkdir(parents=True, exist_ok=True)
 
     to_mp3_320 = args.mp3_320
     to_flac = not to_mp3_320
 
     try:
-        process_url(args.url, out_dir, to_flac, to_mp3_320, args.album)
+        process_urls(args.urls, out_dir, to_flac, to_mp3_320, args.album, jobs=args.jobs)
     except KeyboardInterrupt:
-        console.print("\nDownload interrupted by user")
+        _rich_print("\nDownload interrupted by user")
     except Exception as e:
-        console.print(f"An error occurred: {e}")
-        import traceback
-        traceback.print_exc()
+        _rich_print(f"An error occurred: {e}", with_traceback=True)
 
 
 if __name__ == "__main__":
@@ -2,102 +2,128 @@
 Metadata extraction and tagging functionality for the JioSaavn downloader.
 """
 
-from mutagen.flac import FLAC
-from mutagen.id3 import ID3, TIT2, TALB, TPE1, TRCK, TYER, TCON, APIC
 from pathlib import Path
 from typing import Dict, Any, List
-from .utils import pick_artists
+from .utils import ARTIST_KEYS, pick_artists
 
+# Tag blocks are read and rewritten through one large buffer instead of many small syscalls
+_TAG_IO_BUFFER = 1 << 20
 
-def extract_year(meta: dict) -> str:
-    """Extract year from metadata."""
-    year = None
-    for key in ("release_year", "release_date", "upload_date", "timestamp"):
-        if meta.get(key):
-            year = str(meta[key])[:4]
-            break
-    return year
 
+def _padding(info) -> int:
+    """Keep existing padding while the new tags fit, else reserve 4 KiB so later re-tags stay in place."""
+    return info.padding if info.padding >= 0 else 4096
 
-def extract_genre(meta: dict) -> str:
-    """Extract genre from metadata."""
-    if meta.get("genre"):
-        if isinstance(meta["genre"], list):
-            return "; ".join(meta["genre"])
-        else:
-            return str(meta["genre"])
-    return ""
+
+# Metadata keys each tag is read from, in order of preference
+_TITLE_KEYS = ("title", "track")
+_ALBUM_KEYS = ("album", "album_name")
+_TRACKNUMBER_KEYS = ("track_number", "playlist_index")
+_YEAR_KEYS = ("release_year", "release_date", "upload_date", "timestamp")
+_GENRE_KEYS = ("genre",)
+
+# Every key extract_tags() can derive a tag from, built from the same tuples it reads
+_TAG_SOURCE_KEYS = _TITLE_KEYS + _ALBUM_KEYS + ARTIST_KEYS + _TRACKNUMBER_KEYS + _YEAR_KEYS + _GENRE_KEYS
+
+
+def _first(meta: dict, keys) -> Any:
+    """Return the first populated value among `keys`, else None."""
+    for key in keys:
+        value = meta.get(key)
+        if value:
+            return value
+    return None
+
+
+def has_tag_data(meta: dict) -> bool:
+    """Whether metadata holds anything worth writing, so empty entries skip opening the file."""
+    return any(meta.get(key) for key in _TAG_SOURCE_KEYS)
+
+
+def extract_tags(meta: dict) -> Dict[str, Any]:
+    """Derive every tag value from metadata in one pass; empty values mean "don't write"."""
+    year = _first(meta, _YEAR_KEYS)
+
+    genre = _first(meta, _GENRE_KEYS)
+    if isinstance(genre, list):
+        genre = "; ".join(genre)
+    elif genre:
+        genre = str(genre)
+
+    tracknumber = _first(meta, _TRACKNUMBER_KEYS)
+
+    return {
+        "title": _first(meta, _TITLE_KEYS),
+        "album": _first(meta, _ALBUM_KEYS),
+        "artists": pick_artists(meta),
+        "tracknumber": str(tracknumber) if tracknumber else None,
+        "year": str(year)[:4] if year else None,
+        "genre": genre or "",
+    }
 
 
 def tag_flac(path: Path, meta: dict):
     """Tag FLAC files with metadata"""
+    if not has_tag_data(meta):
+        return
+    from mutagen.flac import FLAC
+
     try:
-        audio = FLAC(str(path))
-        title = meta.get("title") or meta.get("track")
-        album = meta.get("album") or meta.get("album_name")
-        artists = pick_artists(meta)
-
-        if title:
-            audio["TITLE"] = title
-        if album:
-            audio["ALBUM"] = album
-        if artists:
-            audio["ARTIST"] = "; ".join(artists)
-            audio["ALBUMARTIST"] = "; ".join(artists)
-
-        tn = None
-        if meta.get("track_number"):
-            tn = str(meta["track_number"])
-        elif meta.get("playlist_index"):
-            tn = str(meta["playlist_index"])
-        if tn:
-            audio["TRACKNUMBER"] = tn
-
-        year = extract_year(meta)
-        if year:
-            audio["DATE"] = year
-
-        genre = extract_genre(meta)
-        if genre:
-            audio["GENRE"] = genre
-
-        audio.save()
+        with open(path, "rb+", buffering=_TAG_IO_BUFFER) as fh:
+            audio = FLAC(fh)
+            tags = extract_tags(meta)
+
+            if tags["title"]:
+                audio["TITLE"] = tags["title"]
+            if tags["album"]:
+                audio["ALBUM"] = tags["album"]
+            if tags["artists"]:
+                audio["ARTIST"] = "; ".join(tags["artists"])
+                audio["ALBUMARTIST"] = "; ".join(tags["artists"])
+            if tags["tracknumber"]:
+                audio["TRACKNUMBER"] = tags["tracknumber"]
+            if tags["year"]:
+                audio["DATE"] = tags["year"]
+            if tags["genre"]:
+                audio["GENRE"] = tags["genre"]
+
+            # Loading leaves the handle past the metadata blocks; save() re-reads the header from here
+            fh.seek(0)
+            audio.save(fh, padding=_padding)
     except Exception as e:
         print(f"Warning: Failed to tag FLAC file {path}: {e}")
 
 
 def tag_mp3(path: Path, meta: dict):
     """Tag MP3 files with metadata"""
+    if not has_tag_data(meta):
+        return
+    from mutagen.id3 import ID3, TIT2, TALB, TPE1, TRCK, TYER, TCON
+
     try:
-        audio = ID3(str(path))
-        
-        title = meta.get("title") or meta.get("track")
-        album = meta.get("album") or meta.get("album_name")
-        artists = pick_artists(meta)
-
-        if title:
-            audio.add(TIT2(encoding=3, text=title))
-        if album:
-            audio.add(TALB(encoding=3, text=album))
-        if artists:
-            audio.add(TPE1(encoding=3, text="; ".join(artists)))
-
-        tn = None
-        if meta.get("track_number"):
-            tn = str(meta["track_number"])
-        elif meta.get("playlist_index"):
-            tn = str(meta["playlist_index"])
-        if tn:
-            audio.add(TRCK(encoding=3, text=tn))
-
-        year = extract_year(meta)
-        if year:
-            audio.add(TYER(encoding=3, text=year))
-
-        genre = extract_genre(meta)
-        if genre:
-            audio.add(TCON(encoding=3, text=genre))
-
-        audio.save()
+        with open(path, "rb+", buffering=_TAG_IO_BUFFER) as fh:
+            audio = ID3(fh)
+            tags = extract_tags(meta)
+
+            frames = []
+            if tags["title"]:
+                frames.append(TIT2(encoding=3, text=tags["title"]))
+            if tags["album"]:
+                frames.append(TALB(encoding=3, text=tags["album"]))
+            if tags["artists"]:
+                frames.append(TPE1(encoding=3, text="; ".join(tags["artists"])))
+            if tags["tracknumber"]:
+                frames.append(TRCK(encoding=3, text=tags["tracknumber"]))
+            if tags["year"]:
+                frames.append(TYER(encoding=3, text=tags["year"]))
+            if tags["genre"]:
+                frames.append(TCON(encoding=3, text=tags["genre"]))
+
+            # Replace frames by key directly; add() re-validates each one on the way in
+            for frame in frames:
+                audio[frame.HashKey] = frame
+
+            fh.seek(0)
+            audio.save(fh, padding=_padding)
     except Exception as e:
-        print(f"Warning: Failed to tag MP3 file {path}: {e}")
\ No newline at end of file
+        print(f"Warning: Failed to tag MP3 file {path}: {e}")
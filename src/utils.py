@@ -2,60 +2,230 @@
 Utility functions for the JioSaavn downloader.
 """
 
+import hashlib
+import os
 import re
 import subprocess
-import json
-from typing import Tuple, List, Dict, Any
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, Iterator, Tuple
 from pathlib import Path
 
+try:
+    from orjson import loads as _json_loads, dumps as _json_dumps
+except ImportError:
+    import json
+    from json import loads as _json_loads
+
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
+try:
+    from yt_dlp import YoutubeDL
+    from yt_dlp.utils import DownloadError
+except ImportError:  # fall back to the yt-dlp executable
+    YoutubeDL = None
+
+
+_UNSAFE_CHARS = frozenset('\\/:*?"<>|')
+_SANITIZE_RE = re.compile(r'[\\/:*?"<>|]+')
+
 
 def sanitize(name: str) -> str:
     """Sanitize a string to be used as a filename."""
-    return re.sub(r'[\\/:*?"<>|]+', "_", name).strip()
+    # Most titles are already safe; only run the regex when there is something to replace
+    if _UNSAFE_CHARS.isdisjoint(name):
+        return name.strip()
+    return _SANITIZE_RE.sub("_", name).strip()
 
 
-def run_stream(cmd) -> Tuple[int, list]:
+def run_stream(cmd) -> Iterator[Tuple[str, Any]]:
     """
-    Run a subprocess and stream stdout lines back; returns (rc, lines)
+    Run a subprocess and stream its output; yields ("line", raw bytes) per line, then ("rc", code).
+    Lines are left undecoded so callers only pay for decoding the ones they use.
     """
-    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1)
-    lines = []
-    for line in proc.stdout:
-        lines.append(line.rstrip("\n"))
-        yield ("line", line.rstrip("\n"))
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, bufsize=0)
+    fd = proc.stdout.fileno()
+    pending = b""
+    # Read whatever the pipe holds (up to 64 KiB) and split it ourselves
+    while True:
+        chunk = os.read(fd, 65536)
+        if not chunk:
+            break
+        *lines, pending = (pending + chunk).split(b"\n")
+        for line in lines:
+            yield ("line", line.rstrip(b"\r"))
+    if pending:
+        yield ("line", pending.rstrip(b"\r"))
+    proc.stdout.close()
     rc = proc.wait()
     yield ("rc", rc)
 
 
+class QuietLogger:
+    """yt-dlp logger that drops every message, as the subprocess paths drop yt-dlp's own output."""
+
+    def debug(self, msg):
+        pass
+
+    def info(self, msg):
+        pass
+
+    def warning(self, msg):
+        pass
+
+    def error(self, msg):
+        pass
+
+
+# Successful probes keyed by URL, so a URL seen twice in one run is only probed once
+_PROBE_CACHE: Dict[str, Dict[str, Any]] = {}
+
+# Probes are also kept on disk between runs; set JIOSAAVN_NO_CACHE=1 to bypass
+_PROBE_CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "jiosaavn-downloader" / "probe"
+_PROBE_CACHE_TTL = 6 * 60 * 60
+
+
+def _probe_cache_path(url: str) -> Path:
+    return _PROBE_CACHE_DIR / f"{hashlib.sha1(url.encode('utf-8')).hexdigest()}.json"
+
+
+def _read_probe_cache(url: str) -> Dict[str, Any]:
+    """Return the on-disk probe for a URL if it is younger than the TTL, else {}."""
+    path = _probe_cache_path(url)
+    try:
+        if time.time() - path.stat().st_mtime > _PROBE_CACHE_TTL:
+            return {}
+        return _json_loads(path.read_bytes())
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_probe_cache(url: str, info: Dict[str, Any]):
+    """Store a probe on disk; failures only cost a cache miss next time."""
+    try:
+        data = _json_dumps(info)
+        _PROBE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    except (OSError, TypeError, ValueError):
+        return
+
+    path = _probe_cache_path(url)
+    # Write beside the target and rename, so readers never see a partial file
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            tmp.unlink(missing_ok=True)
+        except OSError:
+            pass
+
+
 def probe_info(url: str) -> Dict[str, Any]:
-    """Get detailed info using yt-dlp"""
+    """Get detailed info using yt-dlp, memoized per URL in memory and on disk"""
+    info = _PROBE_CACHE.get(url)
+    if info is not None:
+        return info
+
+    use_disk = not os.environ.get("JIOSAAVN_NO_CACHE")
+    info = _read_probe_cache(url) if use_disk else {}
+    if not info:
+        info = _probe_info(url)
+        if info and use_disk:
+            _write_probe_cache(url, info)
+        if info:
+            # Only a probe made by this process has format URLs fresh enough to download from
+            info["_live_probe"] = True
+    if info:
+        _PROBE_CACHE[url] = info
+    return info
+
+
+_YDL_PROBE_OPTS = {
+    "quiet": True,
+    "no_warnings": True,
+    "logger": QuietLogger(),
+    "skip_download": True,
+}
+# Same retry as the subprocess path: a plain probe first, then with jiosaavn:all
+_YDL_PROBE_OPTS_ALL = {**_YDL_PROBE_OPTS, "extractor_args": {"jiosaavn": {"all": [""]}}}
+# YoutubeDL instances are not thread-safe, so each probing thread keeps its own pair
+_ydl_local = threading.local()
+
+
+def _probe_info(url: str) -> Dict[str, Any]:
+    """Fetch the info dict for a URL, in-process when yt_dlp is importable"""
+    if YoutubeDL is None:
+        return _probe_info_subprocess(url)
+
+    for name, opts in (("plain", _YDL_PROBE_OPTS), ("all", _YDL_PROBE_OPTS_ALL)):
+        ydl = getattr(_ydl_local, name, None)
+        if ydl is None:
+            ydl = YoutubeDL(opts)
+            setattr(_ydl_local, name, ydl)
+        try:
+            return ydl.sanitize_info(ydl.extract_info(url, download=False)) or {}
+        except DownloadError:
+            continue
+    return {}
+
+
+def _probe_info_subprocess(url: str) -> Dict[str, Any]:
+    """Run yt-dlp to dump the info JSON for a URL"""
     cmd = ["yt-dlp", "--ignore-config", "--dump-single-json", url]
     try:
-        out = subprocess.check_output(cmd, text=True, stderr=subprocess.DEVNULL)
-        return json.loads(out)
+        out = subprocess.check_output(cmd, stderr=subprocess.DEVNULL)
+        return _json_loads(out)
     except subprocess.CalledProcessError:
         # Try with different extractor options
         cmd = ["yt-dlp", "--ignore-config", "--dump-single-json", "--extractor-args", "jiosaavn:all", url]
         try:
-            out = subprocess.check_output(cmd, text=True, stderr=subprocess.DEVNULL)
-            return json.loads(out)
+            out = subprocess.check_output(cmd, stderr=subprocess.DEVNULL)
+            return _json_loads(out)
         except:
             return {}
 
 
 def pick_artists(meta: dict):
-    """Extract artist names from metadata."""
-    if meta.get("artist"):
-        return [meta["artist"]]
-    if meta.get("artists"):
-        if isinstance(meta["artists"], list):
-            return [a.get("name", a) if isinstance(a, dict) else str(a) for a in meta["artists"]]
-        return [str(meta["artists"])]
-    if meta.get("creator"):
-        return [meta["creator"]]
+    """Extract artist names from metadata, memoized on the dict for the other per-track callers."""
+    artists = meta.get("_artists_cache")
+    if artists is None:
+        artists = meta["_artists_cache"] = _pick_artists(meta)
+    return artists
+
+
+# Artist fields in order of preference; metadata.has_tag_data() checks the same keys
+ARTIST_KEYS = ("artist", "artists", "creator")
+
+
+def _pick_artists(meta: dict):
+    """Resolve the artist list from the first populated artist field."""
+    for key in ARTIST_KEYS:
+        value = meta.get(key)
+        if not value:
+            continue
+        if isinstance(value, list):
+            return [a.get("name", a) if isinstance(a, dict) else str(a) for a in value]
+        return [str(value)]
     return ["Unknown Artist"]
 
 
+@lru_cache(maxsize=None)
+def _ensure_dir(path: str):
+    """Create an output directory once per process; album tracks share the same one."""
+    Path(path).mkdir(parents=True, exist_ok=True)
+
+
+def _sanitized(entry: dict, key: str, value: str) -> str:
+    """Sanitize a value once per entry, keeping the result on the entry under `key`."""
+    safe = entry.get(key)
+    if safe is None:
+        safe = entry[key] = sanitize(value)
+    return safe
+
+
 def choose_outputs(entry, base_out_dir: Path, force_album_layout: bool):
     """Determine output directory and filename based on entry metadata."""
     artist_list = pick_artists(entry)
@@ -72,17 +242,18 @@ def choose_outputs(entry, base_out_dir: Path, force_album_layout: bool):
         tracknum = str(entry["playlist_autonumber"])
 
     if force_album_layout:
-        subdir = base_out_dir / sanitize(album)
+        subdir = base_out_dir / _sanitized(entry, "_sanitized_album", album)
     else:
-        subdir = base_out_dir / (sanitize(album) if (entry.get("_type") == "playlist" or entry.get("n_entries", 0) > 1) else "")
-    subdir.mkdir(parents=True, exist_ok=True)
+        subdir = base_out_dir / (_sanitized(entry, "_sanitized_album", album) if (entry.get("_type") == "playlist" or entry.get("n_entries", 0) > 1) else "")
+    _ensure_dir(str(subdir))
 
+    safe_title = _sanitized(entry, "_sanitized_title", title)
     if tracknum:
-        filename = f"{tracknum.zfill(2)} - {sanitize(title)}"
+        filename = f"{tracknum.zfill(2)} - {safe_title}"
     else:
         if artist:
-            filename = f"{sanitize(artist)} - {sanitize(title)}"
+            filename = f"{sanitize(artist)} - {safe_title}"
         else:
-            filename = sanitize(title)
+            filename = safe_title
 
-    return subdir, filename, artist_list, album, title, tracknum
\ No newline at end of file
+    return subdir, filename, artist_list, album, title, tracknum